@@ -1,6 +1,9 @@
+import os
+import math
 import random
-from collections import defaultdict
-from matplotlib import pyplot as plt
+import multiprocessing
+import numpy as np
+from numba import njit, prange
 
 
 # bounds for monte carlo'd values
@@ -11,87 +14,117 @@ WALKING_VELOCITY = (0.5, 5)  # meters / second
 WAIT_TIME = (0, 250)  # seconds
 GRID_LENGTH = (5, 20)  # number of sidewalk blocks in each dimension of the grid
 
+# low ends and spans of the bounds above
+#     the reference classes draw low + span * rng.random(), as rng.uniform does, without its call and tuple unpacking
+_CROSSWALK_LENGTH_LO, _CROSSWALK_LENGTH_SPAN = CROSSWALK_LENGTH[0], CROSSWALK_LENGTH[1] - CROSSWALK_LENGTH[0]
+_CROSSWALK_DURATION_LO, _CROSSWALK_DURATION_SPAN = CROSSWALK_DURATION[0], CROSSWALK_DURATION[1] - CROSSWALK_DURATION[0]
+_SIDEWALK_LENGTH_LO, _SIDEWALK_LENGTH_SPAN = SIDEWALK_LENGTH[0], SIDEWALK_LENGTH[1] - SIDEWALK_LENGTH[0]
+_WALKING_VELOCITY_LO, _WALKING_VELOCITY_SPAN = WALKING_VELOCITY[0], WALKING_VELOCITY[1] - WALKING_VELOCITY[0]
+_WAIT_TIME_LO, _WAIT_TIME_SPAN = WAIT_TIME[0], WAIT_TIME[1] - WAIT_TIME[0]
+_GRID_LENGTH_LO, _GRID_LENGTH_SPAN = GRID_LENGTH[0], GRID_LENGTH[1] - GRID_LENGTH[0]
 
-# static variables
-other_direction = {'x':'y', 'y':'x'}
+
+# static variables, integer encodings
+X, Y = 0, 1  # directions
+UL, UR, LL, LR = 0, 1, 2, 3  # sidewalk positions. bit 0 set => right side, bit 1 set => lower side
+END_X, END_Y, END_XY = 1, 2, 3  # end_reached is a bitmask of directions in which maximum grid length has been reached
+# compiled kernels store traffic_light_segments as rows of a (4, 5) array indexed by sidewalk position, NaN rows are absent lights
+LIGHT_X_LENGTH, LIGHT_Y_LENGTH, LIGHT_X_DURATION, LIGHT_Y_DURATION, LIGHT_CYCLE_OFFSET = range(5)
+_JIT_SEED_BLOCK = 64  # simulations run by the compiled kernels per seed
+
+_rng = np.random.default_rng()
 
 
 class traffic_light:
-    def __init__(self, x_length=None, y_length=None, x_signal_duration=None, y_signal_duration=None, initial_state=None):
-        self.x_length = x_length or self.random_length()
-        self.y_length = y_length or self.random_length()
-        self.x_signal_duration = x_signal_duration or self.random_signal_duration()
-        self.y_signal_duration = y_signal_duration or self.random_signal_duration()
-
-        initial_state = initial_state or self.random_state()
-        self.state = initial_state
+    __slots__ = ('lengths', 'x_signal_duration', 'y_signal_duration', 'initial_cycle_time', 'state',
+                 '_x_crossing', '_time_until_switch', '_time_until_switch_twice')
+
+    def __init__(self, x_length, y_length, x_signal_duration, y_signal_duration, initial_state):
+        self.lengths = [x_length, y_length]
+        self.x_signal_duration = x_signal_duration
+        self.y_signal_duration = y_signal_duration
         self.set_initial_time_offset(initial_state = initial_state)
 
+    @classmethod
+    def random(cls, rng=random, x_length=None, y_length=None):
+        # creates a traffic_light from monte carlo'd values, except for any lengths specified
+        # initial_state in interval [0, 2)
+        #   [0, 1) => x direction is crossing
+        #   [1, 2) => y direction is crossing
+        if x_length is None:
+            x_length = _CROSSWALK_LENGTH_LO + _CROSSWALK_LENGTH_SPAN * rng.random()
+        if y_length is None:
+            y_length = _CROSSWALK_LENGTH_LO + _CROSSWALK_LENGTH_SPAN * rng.random()
+        return cls(x_length, y_length,
+                   _CROSSWALK_DURATION_LO + _CROSSWALK_DURATION_SPAN * rng.random(),
+                   _CROSSWALK_DURATION_LO + _CROSSWALK_DURATION_SPAN * rng.random(),
+                   2 * rng.random())
+
+    # lengths are indexed by direction, x_length and y_length are views into them
+    @property
+    def x_length(self):
+        return self.lengths[X]
+
+    @x_length.setter
+    def x_length(self, value):
+        self.lengths[X] = value
+
+    @property
+    def y_length(self):
+        return self.lengths[Y]
+
+    @y_length.setter
+    def y_length(self, value):
+        self.lengths[Y] = value
+
     def set_initial_time_offset(self, initial_state):
-        # creates relative time offset based on initial_state
+        # creates relative time offset based on initial_state, and sets state to initial_state
         # only called during initialization or unit testing
         if initial_state < 1:
             self.initial_cycle_time = self.x_signal_duration * initial_state
         else:
             self.initial_cycle_time = self.x_signal_duration + self.y_signal_duration * (initial_state - 1)
 
-    def random_state(self):
-        # state in interval [0, 2)
-        #   [0, 1) => x direction is crossing
-        #   [1, 2) => y direction is crossing
-        return random.uniform(0, 2)
-
-    def random_length(self):
-        return random.uniform(*CROSSWALK_LENGTH)
-
-    def random_signal_duration(self):
-        return random.uniform(*CROSSWALK_DURATION)
+        self.set_state(0)
 
     def set_state(self, time):
         # sets signal state based on time passed since simulation start
-        mid_cycle_time = (time + self.initial_cycle_time) % (self.x_signal_duration + self.y_signal_duration)
+        # caches the values queried by time_until_can_cross, so they are computed once per state
+        #     everything is derived from the current signal durations here, so changing them takes effect at the next set_state
+        cycle_duration = self.x_signal_duration + self.y_signal_duration
+        mid_cycle_time = (time + self.initial_cycle_time) % cycle_duration
 
-        if mid_cycle_time < self.x_signal_duration:  # x-crossing
+        self._x_crossing = mid_cycle_time < self.x_signal_duration
+        if self._x_crossing:
             self.state = mid_cycle_time / self.x_signal_duration
-        else:   # y-crossing
+            self._time_until_switch = self.x_signal_duration - mid_cycle_time
+            self._time_until_switch_twice = self._time_until_switch + self.y_signal_duration
+        else:
             self.state = 1 + (mid_cycle_time - self.x_signal_duration) / self.y_signal_duration
-
+            self._time_until_switch = cycle_duration - mid_cycle_time
+            self._time_until_switch_twice = self._time_until_switch + self.x_signal_duration
 
     def time_to_cross(self, direction, velocity):
-        if direction == 'x':
-            return self.x_length / velocity
-        else:
-            return self.y_length / velocity
+        # the simulation inlines this as lengths[direction] / velocity, saving a call per crossing
+        return self.lengths[direction] / velocity
 
     def current_crossing_direction(self):
-        # returns 'x' or 'y'
-        if 0 <= self.state < 1:
-            return 'x'
-        else:
-            return 'y'
+        # returns X or Y, as cached by set_state
+        return X if self._x_crossing else Y
 
     def time_until_switch_directions(self):
         # measures time until the crosswalk switches cross-direction
-        if self.current_crossing_direction() == 'x':
-            signal_duration = self.x_signal_duration
-        else:
-            signal_duration = self.y_signal_duration
-
-        ratio_crossing_remaining = 1 - (self.state % 1)
-        return ratio_crossing_remaining * signal_duration
+        return self._time_until_switch
 
     def time_until_switch_directions_twice(self):
         # measures time until the crosswalk switches directions twice
-        if self.current_crossing_direction() == 'x':
-            return self.time_until_switch_directions() + self.y_signal_duration
-        else:
-            return self.time_until_switch_directions() + self.x_signal_duration
+        return self._time_until_switch_twice
 
     def enough_time_to_cross(self, direction, velocity):
         # returns boolean
         #   True if enough time to cross in current state
         # assumes direction matches current_crossing_direction
-        return self.time_to_cross(direction, velocity) <= self.time_until_switch_directions()
+        return self.lengths[direction] / velocity <= self._time_until_switch
 
     def time_until_can_cross(self, direction, velocity):
         # returns non-negative float
@@ -101,40 +134,63 @@ class traffic_light:
         #     eg, that there are no lights switching faster than a pedestrian can cross
         #     this should be guaranteed by the monte carlo'd values of velocity and size
 
-        if self.current_crossing_direction() == direction:
-            if self.enough_time_to_cross(direction, velocity):
+        if self._x_crossing == (direction == X):
+            if self.lengths[direction] / velocity <= self._time_until_switch:
                 return 0
             else:
-                return self.time_until_switch_directions_twice()
+                return self._time_until_switch_twice
         else:
-            return self.time_until_switch_directions()
+            return self._time_until_switch
 
 
 class sidewalk_block:
-    def __init__(self, x_length=None, y_length=None):
-        self.x_length = x_length or self.random_length()
-        self.y_length = y_length or self.random_length()
+    __slots__ = ('lengths',)
+
+    def __init__(self, x_length, y_length):
+        self.lengths = [x_length, y_length]
+
+    @classmethod
+    def random(cls, rng=random, x_length=None, y_length=None):
+        # creates a sidewalk_block from monte carlo'd values, except for any lengths specified
+        if x_length is None:
+            x_length = _SIDEWALK_LENGTH_LO + _SIDEWALK_LENGTH_SPAN * rng.random()
+        if y_length is None:
+            y_length = _SIDEWALK_LENGTH_LO + _SIDEWALK_LENGTH_SPAN * rng.random()
+        return cls(x_length, y_length)
+
+    # lengths are indexed by direction, x_length and y_length are views into them
+    @property
+    def x_length(self):
+        return self.lengths[X]
+
+    @x_length.setter
+    def x_length(self, value):
+        self.lengths[X] = value
+
+    @property
+    def y_length(self):
+        return self.lengths[Y]
 
-    def random_length(self):
-        return random.uniform(*SIDEWALK_LENGTH)
+    @y_length.setter
+    def y_length(self, value):
+        self.lengths[Y] = value
 
     def time_to_cross(self, direction, velocity):
-        if direction == 'x':
-            return self.x_length / velocity
-        else:
-            return self.y_length / velocity
+        # the simulation inlines this as lengths[direction] / velocity, saving a call per crossing
+        return self.lengths[direction] / velocity
 
 
 class pedestrian:
-    def __init__(self, velocity=None, choice_wait_time=None):
-        self.velocity = velocity or self.random_velocity()
-        self.choice_wait_time = choice_wait_time or self.random_choice_wait_time()
+    __slots__ = ('velocity', 'choice_wait_time')
 
-    def random_velocity(self):
-        return random.uniform(*WALKING_VELOCITY)
+    def __init__(self, velocity, choice_wait_time):
+        self.velocity = velocity
+        self.choice_wait_time = choice_wait_time
 
-    def random_choice_wait_time(self):
-        return random.uniform(*WAIT_TIME)
+    @classmethod
+    def random(cls, rng=random):
+        # creates a pedestrian from monte carlo'd values
+        return cls(_WALKING_VELOCITY_LO + _WALKING_VELOCITY_SPAN * rng.random(), _WAIT_TIME_LO + _WAIT_TIME_SPAN * rng.random())
 
     def would_choose_to_wait_for_light(self, wait_time):
         if wait_time <= self.choice_wait_time:
@@ -147,25 +203,31 @@ class city_map:
     # dynamicly creates sidewalk and light segments on demand
     #     handling size matching for grid aligned semgnets
     # tracks grid and sidewalk positions
-    # mnaintains end_reached 4-state flag indicating x/y boundaries
-
-    def __init__(self, x_length=None, y_length=None):
-        self.length = {'x': x_length or self.random_length(),
-                       'y': y_length or self.random_length()
-                      }
-        self.grid_position = {'x':1, 'y':1}  # count initial sidewalk_block
-        self.sidewalk_position = 'upper_left'
-        self.end_reached = False  # False, 'x', 'y', or True. 'x' and 'y' indicate maximum grid length reached in one direction
-
-        self.sidewalk_segment = sidewalk_block()
-        self.traffic_light_segments = {'upper_left': None,
-                                       'lower_left': None,
-                                       'upper_right': None,
-                                       'lower_right': None,
-                                      }
-
-    def random_length(self):
-        return random.uniform(*GRID_LENGTH)
+    # mnaintains end_reached bitmask indicating x/y boundaries
+
+    __slots__ = ('rng', 'length', 'grid_position', 'sidewalk_position', 'end_reached', 'sidewalk_segment', 'traffic_light_segments')
+
+    def __init__(self, x_length, y_length, rng=random, sidewalk_segment=None):
+        # rng draws random values for the segments this map creates, including the initial sidewalk_segment unless given
+        # per-direction values are indexed by X/Y, traffic_light_segments by sidewalk position
+        self.rng = rng
+        self.length = [x_length, y_length]
+        self.grid_position = [1, 1]  # count initial sidewalk_block
+        self.sidewalk_position = UL
+        self.end_reached = 0  # 0, END_X, END_Y, or END_XY. END_X and END_Y indicate maximum grid length reached in one direction
+
+        self.sidewalk_segment = sidewalk_block.random(rng) if sidewalk_segment is None else sidewalk_segment
+        self.traffic_light_segments = [None, None, None, None]
+
+    @classmethod
+    def random(cls, rng=random):
+        # creates a city_map from monte carlo'd values
+        return cls(_GRID_LENGTH_LO + _GRID_LENGTH_SPAN * rng.random(), _GRID_LENGTH_LO + _GRID_LENGTH_SPAN * rng.random(), rng)
+
+    @classmethod
+    def blank(cls, rng=random):
+        # creates a city_map of zero lengths without drawing random values, for tests which set the values they use
+        return cls(0.0, 0.0, rng, sidewalk_block(0.0, 0.0))
 
     def new_sidewalk_block(self, direction):
         # generates new sidewalk_block in specified direction, equating one dimension of length with existing sidewalk_block
@@ -174,240 +236,660 @@ class city_map:
         # handles propogation of attached traffic_lights
 
         # create new sidewalk_block, matching one side length to adjacent current block
-        args = {}
-        if direction == 'x':
-            args['y_length'] = self.sidewalk_segment.y_length
+        if direction == X:
+            self.sidewalk_segment = sidewalk_block.random(self.rng, y_length=self.sidewalk_segment.lengths[Y])
         else:
-            args['x_length'] = self.sidewalk_segment.x_length
-
-        self.sidewalk_segment = sidewalk_block(**args)
+            self.sidewalk_segment = sidewalk_block.random(self.rng, x_length=self.sidewalk_segment.lengths[X])
 
         # update grid position, check for maximum length
         self.grid_position[direction] += 1
         if self.grid_position[direction] >= self.length[direction]:
-            if self.end_reached == False or self.end_reached == direction:
-                self.end_reached = direction
-            else:
-                self.end_reached = True
+            self.end_reached |= 1 << direction
 
         # update sidewalk_position
-        if self.sidewalk_position == 'upper_right':
-            self.sidewalk_position = 'upper_left'
-        elif self.sidewalk_position == 'lower_left':
-            self.sidewalk_position = 'upper_left'
-        else: #  lower_right
-            if direction == 'x':
-                self.sidewalk_position = 'lower_left'
-            else:  # y
-                self.sidewalk_position = 'upper_right'
+        if self.sidewalk_position == LR:
+            if direction == X:
+                self.sidewalk_position = LL
+            else:  # Y
+                self.sidewalk_position = UR
+        else:  # UR or LL
+            self.sidewalk_position = UL
 
         # propogate existing light segments attached to the new sidewalk_block, clear the rest
-        if direction == 'x':
-            self.traffic_light_segments['upper_left'] = self.traffic_light_segments['upper_right']
-            self.traffic_light_segments['lower_left'] = self.traffic_light_segments['lower_right']
-            self.traffic_light_segments['upper_right'] = None
+        segments = self.traffic_light_segments
+        if direction == X:
+            segments[UL] = segments[UR]
+            segments[LL] = segments[LR]
+            segments[UR] = None
 
-        else:  # y
-            self.traffic_light_segments['upper_left'] = self.traffic_light_segments['lower_left']
-            self.traffic_light_segments['upper_right'] = self.traffic_light_segments['lower_right']
-            self.traffic_light_segments['lower_left'] = None
+        else:  # Y
+            segments[UL] = segments[LL]
+            segments[UR] = segments[LR]
+            segments[LL] = None
 
-        self.traffic_light_segments['lower_right'] = None
+        segments[LR] = None
 
     def get_current_traffic_light(self):
         # returns traffic light at current sidewalk_position
         # creates a new instance when needed, equating size with preexisting grid-aligned instances, if any
+        segments = self.traffic_light_segments
+        position = self.sidewalk_position
 
         # return existing light segment if it has already been created
-        if self.traffic_light_segments[self.sidewalk_position] is None:
-
-            # create new traffic_light at this sidewalk_position
-            # match size to preexisting grid-aligned traffic_lights attached to this sidewalk_block
-            args = {}
-            if self.sidewalk_position == 'lower_right':
-                if self.traffic_light_segments['lower_left'] is not None:
-                    args['y_length'] = self.traffic_light_segments['lower_left'].y_length
-                if self.traffic_light_segments['upper_right'] is not None:
-                    args['x_length'] = self.traffic_light_segments['upper_right'].x_length
-
-            elif self.sidewalk_position == 'upper_right':
-                if self.traffic_light_segments['upper_left'] is not None:
-                    args['y_length'] = self.traffic_light_segments['upper_left'].y_length
-                if self.traffic_light_segments['lower_right'] is not None:
-                    args['x_length'] = self.traffic_light_segments['lower_right'].x_length
+        light = segments[position]
+        if light is not None:
+            return light
 
-            elif self.sidewalk_position == 'lower_left':
-                if self.traffic_light_segments['lower_right'] is not None:
-                    args['y_length'] = self.traffic_light_segments['lower_right'].y_length
-                if self.traffic_light_segments['upper_left'] is not None:
-                    args['x_length'] = self.traffic_light_segments['upper_left'].x_length
-
-            elif self.sidewalk_position == 'upper_left':
-                if self.traffic_light_segments['upper_right'] is not None:
-                    args['y_length'] = self.traffic_light_segments['upper_right'].y_length
-                if self.traffic_light_segments['lower_left'] is not None:
-                    args['x_length'] = self.traffic_light_segments['lower_left'].x_length
-
-            # finally, create the new segment
-            self.traffic_light_segments[self.sidewalk_position] = traffic_light(**args)
+        # create new traffic_light at this sidewalk_position
+        # match size to preexisting grid-aligned traffic_lights attached to this sidewalk_block
+        #     horizontal neighbour (position ^ 1) shares y_length, vertical neighbour (position ^ 2) shares x_length
+        args = {}
+        if segments[position ^ 1] is not None:
+            args['y_length'] = segments[position ^ 1].lengths[Y]
+        if segments[position ^ 2] is not None:
+            args['x_length'] = segments[position ^ 2].lengths[X]
 
-        return self.traffic_light_segments[self.sidewalk_position]
+        # finally, create the new segment
+        light = segments[position] = traffic_light.random(self.rng, **args)
+        return light
 
 
 class simulation:
     # simulates a pedestrian traversing a city_map from upper_left to lower_right
     #     respecting city_map length restrictions and end-goal position
     #     respecting pedestrian choice_wait_time at traffic_lights, when able to choose not to wait
-    # pedestrian will choose 
+    # pedestrian will choose
+
+    __slots__ = ('rng', 'city_map', 'pedestrian', 'time', 'waits', '_steps')
+
+    def __init__(self, rng=None):
+        # rng draws all random values of this simulation, eg a random.Random, defaulting to the random module
+        #     which measured fastest when no independent seeding is needed
+        self.rng = random if rng is None else rng
+        self._start(city_map.random(self.rng), pedestrian.random(self.rng))
+
+    @classmethod
+    def blank(cls, rng=None):
+        # creates a simulation on a blank city_map with a motionless pedestrian, without drawing random values
+        #     for tests which set the values they use
+        self = cls.__new__(cls)
+        self.rng = random if rng is None else rng
+        self._start(city_map.blank(self.rng), pedestrian(0.0, 0.0))
+        return self
+
+    def _start(self, city_map, pedestrian):
+        # initializes simulation state around city_map and pedestrian
 
-    def __init__(self):
         # state
-        self.city_map = city_map()
-        self.pedestrian = pedestrian()
+        self.city_map = city_map
+        self.pedestrian = pedestrian
         self.time = 0.0
 
-        # logged data
-        self.cumulative_time_waiting_at_lights = 0.0
-        self.cumulative_proportion_light_half_cycles_waited_at = 0.0
-        self.cumulative_lights_waited_at = 0
+        # logged data, one (cross_wait_time, other_signal_duration) pair per light waited at
+        #     summarised by the cumulative_* properties
+        self.waits = []
+
+        # simulation_step dispatch table, indexed by sidewalk_position UL, UR, LL, LR
+        self._steps = (self._step_upper_left, self._step_upper_right, self._step_lower_left, self._step_lower_right)
+
+    @property
+    def cumulative_time_waiting_at_lights(self):
+        return math.fsum(cross_wait_time for cross_wait_time, _ in self.waits)
+
+    @property
+    def cumulative_proportion_light_half_cycles_waited_at(self):
+        return math.fsum(cross_wait_time / other_signal_duration for cross_wait_time, other_signal_duration in self.waits)
+
+    @property
+    def cumulative_lights_waited_at(self):
+        return len(self.waits)
 
     def simulate(self):
         # checks for end state, executes simulation_step
-        while self.city_map.end_reached != True:  # end_reached is 4-state, so explicit equation to True is necessary
-            self.simulation_step()
+        #     dispatching directly rather than through simulation_step, saving a call per step
+        #     once end_reached is END_X or END_Y, only one direction remains, finish it in _finish_straight_line
+        # raises RuntimeError rather than looping forever if the walk stops making progress
+        #     every light crossing advances grid_position and takes at most 3 steps
+        #     and at most max(1, ceil(length) - 1) crossings are made per direction, even for lengths below 1
+        #     so 3 steps per crossing, with a crossing of slack per direction, always suffice
+        city_map = self.city_map
+        steps = self._steps
+        for _ in range(3 * (math.ceil(city_map.length[X]) + math.ceil(city_map.length[Y]) + 2)):
+            if city_map.end_reached:
+                break
+            steps[city_map.sidewalk_position]()
+        else:
+            raise RuntimeError('simulation exceeded its maximum number of steps')
+
+        if city_map.end_reached != END_XY:
+            self._finish_straight_line(2 - city_map.end_reached)  # END_X => Y, END_Y => X
 
     def simulation_step(self):
         # walks the pedestrian either across one length of a sidewalk, or across a traffic_light
         # tracks time taken in this step
         # demands new city_map segments when needed
         # logs simulation data
-        # assumes is only called if end_reached is not True
-
-        if self.city_map.sidewalk_position == 'upper_left':
-            # must cross sidewalk in this position (no backtracking), but direction of cross is largely arbitrary
-            # if end has been reached in one map direction, always choose the other direction to walk
-            if not self.city_map.end_reached:
-                direction = random.choice('xy')
-            else:
-                direction = other_direction[self.city_map.end_reached]
-
-            if direction == 'x':
-                destination = 'upper_right'
-            else:
-                destination = 'lower_left'
-
-            self.cross_sidewalk(direction, destination)
-
-        elif self.city_map.sidewalk_position == 'lower_left':
-            # check if we can travel farther in y-direction
-            if self.city_map.end_reached != 'y':
-                # give pedestrian choice to wait for light to change (or cross immediately if able)
-                light = self.city_map.get_current_traffic_light()
-                light.set_state(self.time)  # update cycle information
-                cross_wait_time = light.time_until_can_cross('y', self.pedestrian.velocity)
-
-                if self.pedestrian.would_choose_to_wait_for_light(cross_wait_time):
-                    self.time += cross_wait_time
-                    self.cumulative_time_waiting_at_lights += cross_wait_time
-                    self.cumulative_proportion_light_half_cycles_waited_at += cross_wait_time / light.x_signal_duration
-                    self.cumulative_lights_waited_at += 1
-                    self.cross_traffic_light('y')
-                    return
-
-            # otherwise go to the remaining corner
-            self.cross_sidewalk('x', 'lower_right')
-
-        elif self.city_map.sidewalk_position == 'upper_right':
-            # check if we can travel farther in y-direction
-            if self.city_map.end_reached != 'x':
-                # give pedestrian choice to wait for light to change (or cross immediately if able)
-                light = self.city_map.get_current_traffic_light()
-                light.set_state(self.time)  # update cycle information
-                cross_wait_time = light.time_until_can_cross('x', self.pedestrian.velocity)
-
-                if self.pedestrian.would_choose_to_wait_for_light(cross_wait_time):
-                    self.time += cross_wait_time
-                    self.cumulative_time_waiting_at_lights += cross_wait_time
-                    self.cumulative_proportion_light_half_cycles_waited_at += cross_wait_time / light.y_signal_duration
-                    self.cumulative_lights_waited_at += 1
-                    self.cross_traffic_light('x')
-                    return
+        # assumes is only called if end_reached is not END_XY
+        self._steps[self.city_map.sidewalk_position]()
+
+    def _step_upper_left(self):
+        # must cross sidewalk in this position (no backtracking), but direction of cross is largely arbitrary
+        # if end has been reached in one map direction, always choose the other direction to walk
+        city_map = self.city_map
+        end_reached = city_map.end_reached
+        if not end_reached:
+            direction = self.rng.getrandbits(1)  # X or Y
+        else:
+            direction = 2 - end_reached  # END_X => Y, END_Y => X
 
-            # otherwise go to the remaining corner
-            self.cross_sidewalk('y', 'lower_right')
+        # crossing in direction sets that direction's bit of the position, X => UR, Y => LL
+        self.time += city_map.sidewalk_segment.lengths[direction] / self.pedestrian.velocity
+        city_map.sidewalk_position = UL | (1 << direction)
 
-        else:  # lower_right corner
-            # must cross traffic_light in this position (no backtracking), but direction of cross is largely arbitrary
-            #     if end has been reached in one map direction, always choose the other direction to walk
-            #     otherwise choose the direction with a shorter wait time
+    def _step_lower_left(self):
+        city_map = self.city_map
+        pedestrian = self.pedestrian
 
-            light = self.city_map.get_current_traffic_light()
+        # check if we can travel farther in y-direction
+        if not city_map.end_reached & END_Y:
+            # give pedestrian choice to wait for light to change (or cross immediately if able)
+            light = city_map.get_current_traffic_light()
             light.set_state(self.time)  # update cycle information
-            cross_wait_time_x = light.time_until_can_cross('x', self.pedestrian.velocity)
-            cross_wait_time_y = light.time_until_can_cross('y', self.pedestrian.velocity)
-
-            # choose direction of travel
-            if self.city_map.end_reached:
-                direction = other_direction[self.city_map.end_reached]
-            else:
-                if cross_wait_time_x <= cross_wait_time_y:
-                    direction = 'x'
-                else:
-                    direction = 'y'
-
-            if direction == 'x':
-                cross_wait_time = cross_wait_time_x
-                other_signal_duration = light.y_signal_duration
-            else:
-                cross_wait_time = cross_wait_time_y
-                other_signal_duration = light.x_signal_duration
+            cross_wait_time = light.time_until_can_cross(Y, pedestrian.velocity)
+
+            if pedestrian.would_choose_to_wait_for_light(cross_wait_time):
+                self.time += cross_wait_time
+                self.waits.append((cross_wait_time, light.x_signal_duration))
+                self.time += light.lengths[Y] / pedestrian.velocity
+                city_map.new_sidewalk_block(Y)
+                return
+
+        # otherwise go to the remaining corner
+        self.time += city_map.sidewalk_segment.lengths[X] / pedestrian.velocity
+        city_map.sidewalk_position = LR
+
+    def _step_upper_right(self):
+        city_map = self.city_map
+        pedestrian = self.pedestrian
+
+        # check if we can travel farther in x-direction
+        if not city_map.end_reached & END_X:
+            # give pedestrian choice to wait for light to change (or cross immediately if able)
+            light = city_map.get_current_traffic_light()
+            light.set_state(self.time)  # update cycle information
+            cross_wait_time = light.time_until_can_cross(X, pedestrian.velocity)
+
+            if pedestrian.would_choose_to_wait_for_light(cross_wait_time):
+                self.time += cross_wait_time
+                self.waits.append((cross_wait_time, light.y_signal_duration))
+                self.time += light.lengths[X] / pedestrian.velocity
+                city_map.new_sidewalk_block(X)
+                return
+
+        # otherwise go to the remaining corner
+        self.time += city_map.sidewalk_segment.lengths[Y] / pedestrian.velocity
+        city_map.sidewalk_position = LR
+
+    def _step_lower_right(self):
+        # must cross traffic_light in this position (no backtracking), but direction of cross is largely arbitrary
+        #     if end has been reached in one map direction, always choose the other direction to walk
+        #     otherwise choose the direction with a shorter wait time
+        city_map = self.city_map
+        velocity = self.pedestrian.velocity
+
+        light = city_map.get_current_traffic_light()
+        light.set_state(self.time)  # update cycle information
+        cross_wait_time_x = light.time_until_can_cross(X, velocity)
+        cross_wait_time_y = light.time_until_can_cross(Y, velocity)
+
+        # choose direction of travel
+        end_reached = city_map.end_reached
+        if end_reached:
+            direction = 2 - end_reached  # END_X => Y, END_Y => X
+        else:
+            direction = int(cross_wait_time_x > cross_wait_time_y)  # X on ties
+
+        cross_wait_time = (cross_wait_time_x, cross_wait_time_y)[direction]
+        other_signal_duration = (light.y_signal_duration, light.x_signal_duration)[direction]
+
+        # wait for crossing availability, and finally execute crossing
+        self.time += cross_wait_time
+        self.waits.append((cross_wait_time, other_signal_duration))
+        self.time += light.lengths[direction] / velocity
+        city_map.new_sidewalk_block(direction)
+
+    def _finish_straight_line(self, direction):
+        # walks the pedestrian until end_reached is END_XY, given only direction remains to travel
+        #     takes the same path as simulation_step, skipping its end_reached checks and four-way dispatch
+        #     and computing only the one cross wait time needed at the lower right corner
+        city_map = self.city_map
+        velocity = self.pedestrian.velocity
+        bit = 1 << direction  # bit of direction in both end_reached and sidewalk_position
+        step_choose_light = self._steps[bit]  # _step_upper_right for X, _step_lower_left for Y
+        for _ in range(3 * (math.ceil(city_map.length[direction]) + 2)):  # see simulate
+            if city_map.end_reached & bit:
+                break
+            position = city_map.sidewalk_position
+            if not position & bit:
+                # walk along the sidewalk towards the next light in direction
+                self.time += city_map.sidewalk_segment.lengths[direction] / velocity
+                city_map.sidewalk_position = position | bit
+
+            elif position == bit:
+                # pedestrian may choose to wait for this light, or walk around to the lower right corner
+                step_choose_light()
+
+            else:  # LR, must wait for and cross the light in direction
+                light = city_map.get_current_traffic_light()
+                light.set_state(self.time)  # update cycle information
+                cross_wait_time = light.time_until_can_cross(direction, velocity)
+                other_signal_duration = (light.y_signal_duration, light.x_signal_duration)[direction]
 
-            # wait for crossing availability, and finally execute crossing
-            self.time += cross_wait_time
-            self.cumulative_time_waiting_at_lights += cross_wait_time
-            self.cumulative_proportion_light_half_cycles_waited_at += cross_wait_time / other_signal_duration
-            self.cumulative_lights_waited_at += 1
-            self.cross_traffic_light(direction)
+                self.time += cross_wait_time
+                self.waits.append((cross_wait_time, other_signal_duration))
+                self.time += light.lengths[direction] / velocity
+                city_map.new_sidewalk_block(direction)
+        else:
+            raise RuntimeError('simulation exceeded its maximum number of steps')
 
     def cross_sidewalk(self, direction, destination):
+        # the _step methods inline this, saving a call and repeated attribute loads per step
         # calculate time spent
-        self.time += self.city_map.sidewalk_segment.time_to_cross(direction, self.pedestrian.velocity)
+        self.time += self.city_map.sidewalk_segment.lengths[direction] / self.pedestrian.velocity
 
         # update map position
         self.city_map.sidewalk_position = destination
 
-    def cross_traffic_light(self, direction):
+    def cross_traffic_light(self, direction, light):
+        # light is the current traffic_light, as already fetched by the caller to compute its wait
+        # the _step methods inline this, saving a call and repeated attribute loads per step
         # calculate time spent
-        self.time += self.city_map.get_current_traffic_light().time_to_cross(direction, self.pedestrian.velocity)
+        self.time += light.lengths[direction] / self.pedestrian.velocity
 
         # generate new sidewalk_block
         self.city_map.new_sidewalk_block(direction)
 
 
+def _run_one(seed):
+    # executes one reference simulation, returning its logged data as
+    #     (choice_wait_time, average_time_waiting_per_light, average_proportion_light_half_cycles_waited_at)
+    # module level so that multiprocessing workers can unpickle it
+    # draws from its own seeded random.Random, leaving the module-level generator of the worker untouched
+    sim = simulation(rng=random.Random(seed))
+    sim.simulate()
+
+    return (sim.pedestrian.choice_wait_time,
+            sim.cumulative_time_waiting_at_lights / sim.cumulative_lights_waited_at,
+            sim.cumulative_proportion_light_half_cycles_waited_at / sim.cumulative_lights_waited_at)
+
+
+# compiled kernels
+#     mirror simulation.simulate using integer encodings, scalar locals, and small arrays
+#     the classes above remain the reference implementation exercised by Tests
+#     these stand in for ahead-of-time compilation (cython/mypyc), which needs an importable module name
+#     cache=True stores the machine code in __pycache__, so only the first run after an edit pays for compilation
+#         the cache entries are keyed to the module name crosswalk-simulator, recorded when they were first compiled
+#             loading this file under another name, eg through importlib as some_name, then fails in numba's cache loader with
+#             ModuleNotFoundError: No module named 'crosswalk-simulator', unless sys.modules['crosswalk-simulator'] is also set
+#             or the cache is cleared
+#         signatures are left lazy so that importing without calling the kernels stays cheap
+#         fastmath is left off, it measured no faster and would license ignoring the NaN markers of absent lights
+
+@njit(cache=True)
+def _jit_time_until_can_cross(light, time, direction, velocity):
+    # arithmetic equivalent of traffic_light.set_state followed by traffic_light.time_until_can_cross
+    x_signal_duration = light[LIGHT_X_DURATION]
+    y_signal_duration = light[LIGHT_Y_DURATION]
+    mid_cycle_time = (time + light[LIGHT_CYCLE_OFFSET]) % (x_signal_duration + y_signal_duration)
+
+    if mid_cycle_time < x_signal_duration:  # x-crossing
+        crossing_direction = X
+        time_until_switch = x_signal_duration - mid_cycle_time
+        time_until_switch_twice = time_until_switch + y_signal_duration
+    else:  # y-crossing
+        crossing_direction = Y
+        time_until_switch = x_signal_duration + y_signal_duration - mid_cycle_time
+        time_until_switch_twice = time_until_switch + x_signal_duration
+
+    if crossing_direction != direction:
+        return time_until_switch
+    elif light[LIGHT_X_LENGTH + direction] / velocity <= time_until_switch:
+        return 0.0
+    else:
+        return time_until_switch_twice
+
+
+@njit(cache=True)
+def _jit_get_current_traffic_light(traffic_light_segments, sidewalk_position):
+    # returns the light row at sidewalk_position, creating it when absent
+    # matches size to preexisting grid-aligned lights: horizontal neighbours share y_length, vertical neighbours share x_length
+    light = traffic_light_segments[sidewalk_position]
+    if np.isnan(light[LIGHT_X_LENGTH]):
+        x_aligned = traffic_light_segments[sidewalk_position ^ 2]
+        y_aligned = traffic_light_segments[sidewalk_position ^ 1]
+
+        if np.isnan(x_aligned[LIGHT_X_LENGTH]):
+            light[LIGHT_X_LENGTH] = np.random.uniform(CROSSWALK_LENGTH[0], CROSSWALK_LENGTH[1])
+        else:
+            light[LIGHT_X_LENGTH] = x_aligned[LIGHT_X_LENGTH]
+        if np.isnan(y_aligned[LIGHT_X_LENGTH]):
+            light[LIGHT_Y_LENGTH] = np.random.uniform(CROSSWALK_LENGTH[0], CROSSWALK_LENGTH[1])
+        else:
+            light[LIGHT_Y_LENGTH] = y_aligned[LIGHT_Y_LENGTH]
+
+        light[LIGHT_X_DURATION] = np.random.uniform(CROSSWALK_DURATION[0], CROSSWALK_DURATION[1])
+        light[LIGHT_Y_DURATION] = np.random.uniform(CROSSWALK_DURATION[0], CROSSWALK_DURATION[1])
+
+        # see traffic_light.set_initial_time_offset
+        initial_state = np.random.uniform(0, 2)
+        if initial_state < 1:
+            light[LIGHT_CYCLE_OFFSET] = light[LIGHT_X_DURATION] * initial_state
+        else:
+            light[LIGHT_CYCLE_OFFSET] = light[LIGHT_X_DURATION] + light[LIGHT_Y_DURATION] * (initial_state - 1)
+
+    return light
+
+
+@njit(cache=True)
+def _jit_simulate():
+    # compiled equivalent of simulation().simulate()
+    # returns logged data as (choice_wait_time, cumulative_time_waiting_at_lights,
+    #     cumulative_proportion_light_half_cycles_waited_at, cumulative_lights_waited_at)
+
+    # pedestrian
+    velocity = np.random.uniform(WALKING_VELOCITY[0], WALKING_VELOCITY[1])
+    choice_wait_time = np.random.uniform(WAIT_TIME[0], WAIT_TIME[1])
+
+    # city_map, per-direction values indexed by X/Y
+    length = np.empty(2)
+    sidewalk_segment = np.empty(2)
+    for direction in range(2):
+        length[direction] = np.random.uniform(GRID_LENGTH[0], GRID_LENGTH[1])
+        sidewalk_segment[direction] = np.random.uniform(SIDEWALK_LENGTH[0], SIDEWALK_LENGTH[1])
+    grid_position = np.ones(2)
+    sidewalk_position = UL
+    end_reached = 0
+    traffic_light_segments = np.full((4, 5), np.nan)
+
+    # state and logged data
+    time = 0.0
+    cumulative_time_waiting_at_lights = 0.0
+    cumulative_proportion_light_half_cycles_waited_at = 0.0
+    cumulative_lights_waited_at = 0
+
+    while end_reached != END_XY:
+        if sidewalk_position == UL:
+            # cross sidewalk, in the only direction left if end has been reached in the other
+            if end_reached == 0:
+                direction = X if np.random.random() < 0.5 else Y
+            else:
+                direction = 2 - end_reached  # END_X => Y, END_Y => X
+            time += sidewalk_segment[direction] / velocity
+            sidewalk_position ^= 1 << direction
+            continue
+
+        if sidewalk_position == LR:
+            # must cross traffic_light, choosing the shorter wait unless end has been reached in one direction
+            light = _jit_get_current_traffic_light(traffic_light_segments, sidewalk_position)
+            cross_wait_time_x = _jit_time_until_can_cross(light, time, X, velocity)
+            cross_wait_time_y = _jit_time_until_can_cross(light, time, Y, velocity)
+            if end_reached:
+                direction = 2 - end_reached  # END_X => Y, END_Y => X
+            elif cross_wait_time_x <= cross_wait_time_y:
+                direction = X
+            else:
+                direction = Y
+            cross_wait_time = cross_wait_time_x if direction == X else cross_wait_time_y
+
+        else:
+            # lower_left crosses traffic_light in y, upper_right in x
+            #     otherwise walk sidewalk to the remaining corner
+            #     the light is only created when it may be crossed, as in _step_lower_left and _step_upper_right
+            direction = Y if sidewalk_position == LL else X
+            if end_reached & (1 << direction):
+                time += sidewalk_segment[1 - direction] / velocity
+                sidewalk_position = LR
+                continue
+            light = _jit_get_current_traffic_light(traffic_light_segments, sidewalk_position)
+            cross_wait_time = _jit_time_until_can_cross(light, time, direction, velocity)
+            if cross_wait_time > choice_wait_time:
+                time += sidewalk_segment[1 - direction] / velocity
+                sidewalk_position = LR
+                continue
+
+        # wait for crossing availability, and execute crossing
+        time += cross_wait_time
+        cumulative_time_waiting_at_lights += cross_wait_time
+        cumulative_proportion_light_half_cycles_waited_at += cross_wait_time / light[LIGHT_Y_DURATION - direction]
+        cumulative_lights_waited_at += 1
+        time += light[LIGHT_X_LENGTH + direction] / velocity
+
+        # generate new sidewalk_block, see city_map.new_sidewalk_block
+        sidewalk_segment[direction] = np.random.uniform(SIDEWALK_LENGTH[0], SIDEWALK_LENGTH[1])
+        grid_position[direction] += 1
+        if grid_position[direction] >= length[direction]:
+            end_reached |= 1 << direction
+        sidewalk_position ^= 1 << direction
+
+        # propogate light segments attached to the new sidewalk_block, clear the rest
+        for position in range(4):
+            if position & (1 << direction):
+                traffic_light_segments[position] = np.nan
+            else:
+                traffic_light_segments[position] = traffic_light_segments[position | (1 << direction)]
+
+    return choice_wait_time, cumulative_time_waiting_at_lights, cumulative_proportion_light_half_cycles_waited_at, cumulative_lights_waited_at
+
+
+@njit(cache=True, parallel=True)
+def _jit_run_simulations(n, seeds):
+    # returns (n, 3) array of choice_wait_time, average_time_waiting_per_light, average_proportion_light_half_cycles_waited_at
+    # simulations run in blocks of _JIT_SEED_BLOCK spread across threads
+    #     each block first seeds the numba random state of its thread from seeds
+    #     so results are reproducible from seeds whichever thread runs a block, and reseeding stays cheap
+    # seeds is a uint32 array of at least ceil(n / _JIT_SEED_BLOCK) entries
+    results = np.empty((n, 3))
+    for block in prange((n + _JIT_SEED_BLOCK - 1) // _JIT_SEED_BLOCK):
+        np.random.seed(seeds[block])
+        for i in range(block * _JIT_SEED_BLOCK, min(n, (block + 1) * _JIT_SEED_BLOCK)):
+            choice_wait_time, time_waiting, proportion_waited, lights_waited_at = _jit_simulate()
+            results[i, 0] = choice_wait_time
+            results[i, 1] = time_waiting / lights_waited_at
+            results[i, 2] = proportion_waited / lights_waited_at
+    return results
+
+
+# vectorized kernels
+#     advance an ensemble of independent simulations in lockstep, one lane per simulation
+#     same integer encodings as the compiled kernels, with a leading lane axis on every array
+
+def _vec_time_until_can_cross(lights, time, direction, velocity):
+    # lanewise _jit_time_until_can_cross, lights is a (lanes, 5) array of light rows
+    x_signal_duration = lights[:, LIGHT_X_DURATION]
+    y_signal_duration = lights[:, LIGHT_Y_DURATION]
+    mid_cycle_time = (time + lights[:, LIGHT_CYCLE_OFFSET]) % (x_signal_duration + y_signal_duration)
+
+    x_crossing = mid_cycle_time < x_signal_duration
+    time_until_switch = np.where(x_crossing, x_signal_duration, x_signal_duration + y_signal_duration) - mid_cycle_time
+    time_until_switch_twice = time_until_switch + np.where(x_crossing, y_signal_duration, x_signal_duration)
+    crossing_direction = np.where(x_crossing, X, Y)
+    time_to_cross = lights[np.arange(len(lights)), LIGHT_X_LENGTH + direction] / velocity
+
+    return np.where(crossing_direction != direction, time_until_switch,
+                    np.where(time_to_cross <= time_until_switch, 0.0, time_until_switch_twice))
+
+
+def _vec_get_current_traffic_lights(traffic_light_segments, lanes, sidewalk_positions, rng=_rng):
+    # lanewise _jit_get_current_traffic_light, returns (lanes, 5) array of light rows
+    # rng is the numpy Generator drawing any newly created lights
+    lights = traffic_light_segments[lanes, sidewalk_positions]
+    absent = np.isnan(lights[:, LIGHT_X_LENGTH])
+    if absent.any():
+        lanes = lanes[absent]
+        sidewalk_positions = sidewalk_positions[absent]
+        k = len(lanes)
+
+        new_lights = np.empty((k, 5))
+        x_aligned = traffic_light_segments[lanes, sidewalk_positions ^ 2, LIGHT_X_LENGTH]
+        y_aligned = traffic_light_segments[lanes, sidewalk_positions ^ 1, LIGHT_Y_LENGTH]
+        new_lights[:, LIGHT_X_LENGTH] = np.where(np.isnan(x_aligned), rng.uniform(*CROSSWALK_LENGTH, size=k), x_aligned)
+        new_lights[:, LIGHT_Y_LENGTH] = np.where(np.isnan(y_aligned), rng.uniform(*CROSSWALK_LENGTH, size=k), y_aligned)
+        new_lights[:, LIGHT_X_DURATION] = rng.uniform(*CROSSWALK_DURATION, size=k)
+        new_lights[:, LIGHT_Y_DURATION] = rng.uniform(*CROSSWALK_DURATION, size=k)
+
+        initial_state = rng.uniform(0, 2, size=k)
+        new_lights[:, LIGHT_CYCLE_OFFSET] = np.where(initial_state < 1,
+                                                     new_lights[:, LIGHT_X_DURATION] * initial_state,
+                                                     new_lights[:, LIGHT_X_DURATION] + new_lights[:, LIGHT_Y_DURATION] * (initial_state - 1))
+
+        traffic_light_segments[lanes, sidewalk_positions] = new_lights
+        lights[absent] = new_lights
+
+    return lights
+
+
+def _vec_run_simulations(n, rng=None):
+    # vectorized equivalent of _jit_run_simulations
+    # rng is a numpy Generator, defaulting to the module PCG64 _rng, every draw is a batch across lanes
+    #     each iteration advances every unfinished lane through the upper_left, lower_left/upper_right, and lower_right steps in turn
+    #     so a lane may take several simulation steps per iteration, always in the same order as simulation.simulate
+
+    rng = _rng if rng is None else rng
+
+    # pedestrians
+    velocity = rng.uniform(*WALKING_VELOCITY, size=n)
+    choice_wait_time = rng.uniform(*WAIT_TIME, size=n)
+
+    # city_maps
+    length = rng.uniform(*GRID_LENGTH, size=(n, 2))
+    sidewalk_segment = rng.uniform(*SIDEWALK_LENGTH, size=(n, 2))
+    grid_position = np.ones((n, 2))
+    sidewalk_position = np.full(n, UL, dtype=np.int8)
+    end_reached = np.zeros(n, dtype=np.int8)
+    traffic_light_segments = np.full((n, 4, 5), np.nan)
+
+    # state and logged data
+    time = np.zeros(n)
+    cumulative_time_waiting_at_lights = np.zeros(n)
+    cumulative_proportion_light_half_cycles_waited_at = np.zeros(n)
+    cumulative_lights_waited_at = np.zeros(n)
+
+    def cross_traffic_lights(lanes, lights, direction, cross_wait_time):
+        # wait for crossing availability, execute crossing, and generate new sidewalk_blocks
+        time[lanes] += cross_wait_time + lights[np.arange(len(lanes)), LIGHT_X_LENGTH + direction] / velocity[lanes]
+        cumulative_time_waiting_at_lights[lanes] += cross_wait_time
+        cumulative_proportion_light_half_cycles_waited_at[lanes] += cross_wait_time / lights[np.arange(len(lanes)), LIGHT_Y_DURATION - direction]
+        cumulative_lights_waited_at[lanes] += 1
+
+        sidewalk_segment[lanes, direction] = rng.uniform(*SIDEWALK_LENGTH, size=len(lanes))
+        grid_position[lanes, direction] += 1
+        end_reached[lanes] |= np.where(grid_position[lanes, direction] >= length[lanes, direction], 1 << direction, 0).astype(np.int8)
+        sidewalk_position[lanes] ^= (1 << direction).astype(np.int8)
+
+        # propogate light segments attached to the new sidewalk_blocks, clear the rest
+        for crossed in (X, Y):
+            crossed_lanes = lanes[direction == crossed]
+            for position in range(4):
+                if position & (1 << crossed):
+                    traffic_light_segments[crossed_lanes, position] = np.nan
+                else:
+                    traffic_light_segments[crossed_lanes, position] = traffic_light_segments[crossed_lanes, position | (1 << crossed)]
+
+    while True:
+        active = end_reached != END_XY
+        if not active.any():
+            break
+
+        # upper_left: cross sidewalk, in the only direction left if end has been reached in the other
+        lanes = np.flatnonzero(active & (sidewalk_position == UL))
+        direction = np.where(end_reached[lanes] == 0, rng.integers(2, size=len(lanes)), 2 - end_reached[lanes])
+        time[lanes] += sidewalk_segment[lanes, direction] / velocity[lanes]
+        sidewalk_position[lanes] ^= (1 << direction).astype(np.int8)
+
+        # lower_left crosses traffic_light in y, upper_right in x
+        #     otherwise walk sidewalk to the remaining corner
+        lanes = np.flatnonzero(active & ((sidewalk_position == LL) | (sidewalk_position == UR)))
+        direction = np.where(sidewalk_position[lanes] == LL, Y, X)
+        blocked = (end_reached[lanes] & (1 << direction)) != 0
+
+        walking = lanes[blocked]
+        lanes, direction = lanes[~blocked], direction[~blocked]
+        lights = _vec_get_current_traffic_lights(traffic_light_segments, lanes, sidewalk_position[lanes], rng)
+        cross_wait_time = _vec_time_until_can_cross(lights, time[lanes], direction, velocity[lanes])
+        waiting = cross_wait_time <= choice_wait_time[lanes]
+
+        walking = np.concatenate((walking, lanes[~waiting]))
+        time[walking] += sidewalk_segment[walking, np.where(sidewalk_position[walking] == LL, X, Y)] / velocity[walking]
+        sidewalk_position[walking] = LR
+        cross_traffic_lights(lanes[waiting], lights[waiting], direction[waiting], cross_wait_time[waiting])
+
+        # lower_right: must cross traffic_light, choosing the shorter wait unless end has been reached in one direction
+        lanes = np.flatnonzero((end_reached != END_XY) & (sidewalk_position == LR))
+        lights = _vec_get_current_traffic_lights(traffic_light_segments, lanes, sidewalk_position[lanes], rng)
+        cross_wait_time_x = _vec_time_until_can_cross(lights, time[lanes], X, velocity[lanes])
+        cross_wait_time_y = _vec_time_until_can_cross(lights, time[lanes], Y, velocity[lanes])
+        direction = np.where(end_reached[lanes] != 0, 2 - end_reached[lanes], np.where(cross_wait_time_x <= cross_wait_time_y, X, Y)).astype(np.int64)
+        cross_traffic_lights(lanes, lights, direction, np.where(direction == X, cross_wait_time_x, cross_wait_time_y))
+
+    return np.column_stack((choice_wait_time,
+                            cumulative_time_waiting_at_lights / cumulative_lights_waited_at,
+                            cumulative_proportion_light_half_cycles_waited_at / cumulative_lights_waited_at))
+
+
 class monte_carlo:
-    def __init__(self):
-        self.log = defaultdict(list)
+    # logged data names, in the column order returned by the simulation runners
+    log_names = ('choice_wait_time', 'average_time_waiting_per_light', 'average_proportion_light_half_cycles_waited_at')
 
-    def run_simulations(self, n=50):
-        for _ in range(n):
-            # execute simulation
-            sim = simulation()
-            sim.simulate()
+    __slots__ = ('log',)
 
-            # accumulate data
-            self.log['choice_wait_time'].append(sim.pedestrian.choice_wait_time)
-            self.log['average_time_waiting_per_light'].append(sim.cumulative_time_waiting_at_lights / sim.cumulative_lights_waited_at)
-            self.log['average_proportion_light_half_cycles_waited_at'].append(sim.cumulative_proportion_light_half_cycles_waited_at / sim.cumulative_lights_waited_at)
+    def __init__(self):
+        self.log = {name: np.empty(0) for name in self.log_names}
+
+    def run_simulations(self, n=50, method='jit', processes=None, seed=None):
+        # method is 'jit' for the compiled kernel, 'vectorized' for the lockstep NumPy ensemble, or 'python' for the reference classes
+        #     the default is 'jit', every method draws from its own generators, so runs differ between methods for the same seed
+        # processes sets the worker pool size for the 'python' method, defaulting to all cores
+        # seed makes a run reproducible, otherwise each method is seeded from the random module
+        #     so that runs stay reproducible under random.seed, as they were when 'python' was the default
+        seeder = random if seed is None else random.Random(seed)
+        if method == 'jit':
+            seeds = np.array([seeder.getrandbits(32) for _ in range(-(-n // _JIT_SEED_BLOCK))], dtype=np.uint32)
+            results = _jit_run_simulations(n, seeds)
+        elif method == 'vectorized':
+            results = _vec_run_simulations(n, np.random.default_rng(seeder.getrandbits(64)))
+        elif method == 'python':
+            # execute simulations, seeding each from seeder and collecting results in seed order
+            #     so that the log is reproducible regardless of worker count
+            # no more workers than simulations are started, each pays for importing numpy and numba
+            processes = max(1, min(n, processes or os.cpu_count()))
+            seeds = [seeder.getrandbits(64) for _ in range(n)]
+            results = np.empty((n, len(self.log_names)))
+            # spawned rather than forked, forking after the compiled kernels have started their worker threads can deadlock
+            #     so scripts calling this must guard their entry point with if __name__ == '__main__'
+            with multiprocessing.get_context('spawn').Pool(processes) as pool:
+                for i, result in enumerate(pool.imap(_run_one, seeds, chunksize=max(1, n // (4 * processes)))):
+                    results[i] = result
+        else:
+            raise ValueError(f'unknown method {method!r}, expected one of jit, vectorized, python')
+
+        # accumulate data
+        for column, name in enumerate(self.log_names):
+            self.log[name] = np.concatenate((self.log[name], results[:, column]))
 
     def plot(self):
         # plot accumulated data
+        # matplotlib is imported here so that simulating without plotting, including in worker processes, does not pay for it
+        from matplotlib import pyplot as plt
+
+        # markers are drawn as a single rasterized line without segments, rather than a scatter collection of n paths
+        #     markersize 1.4 matches the area of the previous scatter size s=2
         plt.figure()
-        plt.scatter(self.log['choice_wait_time'], self.log['average_time_waiting_per_light'], marker='x', s=2, color='red')
+        plt.plot(self.log['choice_wait_time'], self.log['average_time_waiting_per_light'], linestyle='', marker='x', markersize=1.4, color='red', rasterized=True)
         plt.xlabel('choice_wait_time')
         plt.ylabel('average_time_waiting_per_light')
 
         plt.figure()
-        plt.scatter(self.log['choice_wait_time'], self.log['average_proportion_light_half_cycles_waited_at'], marker='x', s=2, color='blue')
+        plt.plot(self.log['choice_wait_time'], self.log['average_proportion_light_half_cycles_waited_at'], linestyle='', marker='x', markersize=1.4, color='blue', rasterized=True)
         plt.xlabel('choice_wait_time')
         plt.ylabel('average_proportion_light_half_cycles_waited_at')
 
@@ -417,10 +899,20 @@ class monte_carlo:
 
 
 class Tests:
+    def test_seeded_simulation(self):
+        # identically seeded rngs drive identical simulations
+        logs = []
+        for _ in range(2):
+            sim = simulation(rng=random.Random(5))
+            sim.simulate()
+            logs.append((sim.pedestrian.choice_wait_time, sim.time, sim.cumulative_lights_waited_at))
+        assert logs[0] == logs[1]
+
     def test_traffic_light(self):
         light = traffic_light(x_length=3, y_length=5, x_signal_duration=7, y_signal_duration=11, initial_state=0.5)
 
         assert light.state == 0.5
+        assert light.time_until_switch_directions() == 3.5
         light.set_state(0)
         assert light.state == 0.5
         light.set_state(18)
@@ -438,27 +930,36 @@ class Tests:
 
         light.set_initial_time_offset(initial_state = 0.5)
         light.set_state(0)
-        assert light.current_crossing_direction() == 'x'
+        assert light.current_crossing_direction() == X
 
         light.set_initial_time_offset(initial_state = 1.5)
         light.set_state(0)
-        assert light.current_crossing_direction() == 'y'
+        assert light.current_crossing_direction() == Y
 
         light.set_initial_time_offset(initial_state = 1)
         light.set_state(0)
-        assert light.current_crossing_direction() == 'y'
+        assert light.current_crossing_direction() == Y
+
+        # changed signal durations take effect at the next set_state, without resetting the time offset
+        other_light = traffic_light(x_length=3, y_length=5, x_signal_duration=7, y_signal_duration=11, initial_state=0)
+        other_light.x_signal_duration = 2
+        other_light.y_signal_duration = 3
+        other_light.set_state(6)
+        assert other_light.state == 0.5
+        assert other_light.time_until_switch_directions() == 1
+        assert other_light.time_until_switch_directions_twice() == 4
 
         light.set_initial_time_offset(initial_state = 0.5)
         light.set_state(0)
 
-        assert light.time_to_cross('x', 2) == 1.5
-        assert light.time_to_cross('y', 2) == 2.5
+        assert light.time_to_cross(X, 2) == 1.5
+        assert light.time_to_cross(Y, 2) == 2.5
 
-        assert light.current_crossing_direction() == 'x'
+        assert light.current_crossing_direction() == X
         light.set_state(4.5 + 19*3)
-        assert light.current_crossing_direction() == 'y'
+        assert light.current_crossing_direction() == Y
         light.set_state(16)
-        assert light.current_crossing_direction() == 'x'
+        assert light.current_crossing_direction() == X
 
         assert light.time_until_switch_directions() == 5.5
         assert light.time_until_switch_directions_twice() == 16.5
@@ -466,19 +967,30 @@ class Tests:
         assert light.time_until_switch_directions() == 10
         assert light.time_until_switch_directions_twice() == 17
 
-        assert light.enough_time_to_cross('y', 1) == True
-        assert light.enough_time_to_cross('y', 0.1) == False
+        assert light.enough_time_to_cross(Y, 1) == True
+        assert light.enough_time_to_cross(Y, 0.1) == False
 
-        assert light.time_until_can_cross('y', 1) == 0
-        assert light.time_until_can_cross('x', 1) == 10
-        assert light.time_until_can_cross('y', 0.1) == 17
+        assert light.time_until_can_cross(Y, 1) == 0
+        assert light.time_until_can_cross(X, 1) == 10
+        assert light.time_until_can_cross(Y, 0.1) == 17
+
+        # test random construction keeps specified lengths
+        light = traffic_light.random(y_length=3)
+        assert light.y_length == 3
+        assert CROSSWALK_LENGTH[0] <= light.x_length <= CROSSWALK_LENGTH[1]
+        assert 0 <= light.state < 2
 
     def test_sidewalk_block(self):
         sb = sidewalk_block(x_length=3, y_length=5)
 
-        assert sb.time_to_cross('x', 1) == 3
-        assert sb.time_to_cross('x', 0.5) == 6
-        assert sb.time_to_cross('y', 2.5) == 2
+        assert sb.time_to_cross(X, 1) == 3
+        assert sb.time_to_cross(X, 0.5) == 6
+        assert sb.time_to_cross(Y, 2.5) == 2
+
+        # test random construction keeps specified lengths, including 0
+        sb = sidewalk_block.random(x_length=0)
+        assert sb.x_length == 0
+        assert SIDEWALK_LENGTH[0] <= sb.y_length <= SIDEWALK_LENGTH[1]
 
     def test_pedestrian(self):
         p = pedestrian(velocity=3, choice_wait_time=5)
@@ -490,52 +1002,52 @@ class Tests:
         cm = city_map(x_length=3, y_length=5)
 
         # test initial state
-        assert cm.grid_position['x'] == 1
-        assert cm.grid_position['y'] == 1
-        assert cm.sidewalk_position == 'upper_left'
-        assert cm.end_reached == False
+        assert cm.grid_position[X] == 1
+        assert cm.grid_position[Y] == 1
+        assert cm.sidewalk_position == UL
+        assert cm.end_reached == 0
 
         # test new traffic_lights
-        cm.sidewalk_position = 'upper_right'
+        cm.sidewalk_position = UR
         light_ur = cm.get_current_traffic_light()
-        for loc, segment in cm.traffic_light_segments.items():
-            if loc == 'upper_right':
+        for loc, segment in enumerate(cm.traffic_light_segments):
+            if loc == UR:
                 assert segment == light_ur
             else:
                 assert segment is None
 
         cm.get_current_traffic_light()
 
-        cm.sidewalk_position = 'lower_left'
+        cm.sidewalk_position = LL
         light_ll = cm.get_current_traffic_light()
-        for loc, segment in cm.traffic_light_segments.items():
-            if loc == 'upper_right':
+        for loc, segment in enumerate(cm.traffic_light_segments):
+            if loc == UR:
                 assert segment == light_ur
-            elif loc == 'lower_left':
+            elif loc == LL:
                 assert segment == light_ll
             else:
                 assert segment is None
 
-        cm.sidewalk_position = 'upper_left'
+        cm.sidewalk_position = UL
         light_ul = cm.get_current_traffic_light()
-        for loc, segment in cm.traffic_light_segments.items():
-            if loc == 'upper_right':
+        for loc, segment in enumerate(cm.traffic_light_segments):
+            if loc == UR:
                 assert segment == light_ur
-            elif loc == 'lower_left':
+            elif loc == LL:
                 assert segment == light_ll
-            elif loc == 'upper_left':
+            elif loc == UL:
                 assert segment == light_ul
             else:
                 assert segment is None
 
-        cm.sidewalk_position = 'lower_right'
+        cm.sidewalk_position = LR
         light_lr = cm.get_current_traffic_light()
-        for loc, segment in cm.traffic_light_segments.items():
-            if loc == 'upper_right':
+        for loc, segment in enumerate(cm.traffic_light_segments):
+            if loc == UR:
                 assert segment == light_ur
-            elif loc == 'lower_left':
+            elif loc == LL:
                 assert segment == light_ll
-            elif loc == 'upper_left':
+            elif loc == UL:
                 assert segment == light_ul
             else:
                 assert segment == light_lr
@@ -548,136 +1060,143 @@ class Tests:
 
         # test creating new sidewalk_blocks
         sb = cm.sidewalk_segment
-        cm.new_sidewalk_block('x')
+        cm.new_sidewalk_block(X)
 
         sb2 = cm.sidewalk_segment
         assert sb.y_length == sb2.y_length
-        assert cm.grid_position['x'] == 2
-        assert cm.grid_position['y'] == 1
+        assert cm.grid_position[X] == 2
+        assert cm.grid_position[Y] == 1
 
-        assert cm.traffic_light_segments['upper_left'] == light_ur
-        assert cm.traffic_light_segments['lower_left'] == light_lr
-        assert cm.traffic_light_segments['lower_right'] == None
-        assert cm.traffic_light_segments['lower_right'] == None
+        assert cm.traffic_light_segments[UL] == light_ur
+        assert cm.traffic_light_segments[LL] == light_lr
+        assert cm.traffic_light_segments[LR] == None
+        assert cm.traffic_light_segments[LR] == None
 
-        cm.new_sidewalk_block('y')
+        cm.new_sidewalk_block(Y)
 
         sb3 = cm.sidewalk_segment
         assert sb2.x_length == sb3.x_length
-        assert cm.grid_position['x'] == 2
-        assert cm.grid_position['y'] == 2
+        assert cm.grid_position[X] == 2
+        assert cm.grid_position[Y] == 2
 
-        assert cm.traffic_light_segments['upper_left'] == light_lr
-        assert cm.traffic_light_segments['lower_left'] == None
-        assert cm.traffic_light_segments['lower_right'] == None
-        assert cm.traffic_light_segments['lower_right'] == None
+        assert cm.traffic_light_segments[UL] == light_lr
+        assert cm.traffic_light_segments[LL] == None
+        assert cm.traffic_light_segments[LR] == None
+        assert cm.traffic_light_segments[LR] == None
 
         # test end_reached
-        assert cm.end_reached == False
+        assert cm.end_reached == 0
 
-        cm.new_sidewalk_block('x')
-        assert cm.end_reached == 'x'
+        cm.new_sidewalk_block(X)
+        assert cm.end_reached == END_X
 
-        cm.new_sidewalk_block('y')
-        assert cm.end_reached == 'x'
-        cm.new_sidewalk_block('y')
-        assert cm.end_reached == 'x'
-        cm.new_sidewalk_block('y')
-        assert cm.end_reached == True
+        cm.new_sidewalk_block(Y)
+        assert cm.end_reached == END_X
+        cm.new_sidewalk_block(Y)
+        assert cm.end_reached == END_X
+        cm.new_sidewalk_block(Y)
+        assert cm.end_reached == END_XY
 
         cm = city_map(x_length=5, y_length=3)
-        cm.new_sidewalk_block('y')
-        assert cm.end_reached == False
-        cm.new_sidewalk_block('y')
-        assert cm.end_reached == 'y'
+        cm.new_sidewalk_block(Y)
+        assert cm.end_reached == 0
+        cm.new_sidewalk_block(Y)
+        assert cm.end_reached == END_Y
 
         # test sidewalk position when creating new sidewalk_blocks
         cm = city_map(x_length=5, y_length=3)
 
-        cm.sidewalk_position = 'upper_right'
-        cm.new_sidewalk_block('y')
-        assert cm.sidewalk_position == 'upper_left'
+        cm.sidewalk_position = UR
+        cm.new_sidewalk_block(Y)
+        assert cm.sidewalk_position == UL
 
-        cm.sidewalk_position = 'lower_left'
-        cm.new_sidewalk_block('x')
-        assert cm.sidewalk_position == 'upper_left'
+        cm.sidewalk_position = LL
+        cm.new_sidewalk_block(X)
+        assert cm.sidewalk_position == UL
 
-        cm.sidewalk_position = 'lower_right'
-        cm.new_sidewalk_block('x')
-        assert cm.sidewalk_position == 'lower_left'
+        cm.sidewalk_position = LR
+        cm.new_sidewalk_block(X)
+        assert cm.sidewalk_position == LL
 
-        cm.sidewalk_position = 'lower_right'
-        cm.new_sidewalk_block('y')
-        assert cm.sidewalk_position == 'upper_right'
+        cm.sidewalk_position = LR
+        cm.new_sidewalk_block(Y)
+        assert cm.sidewalk_position == UR
 
     def test_simulation(self):
+        # test blank simulations draw no random values
+        rng = random.Random(3)
+        rng_state = rng.getstate()
+        sim = simulation.blank(rng)
+        assert rng.getstate() == rng_state
+        assert sim.city_map.length == [0, 0] and sim.pedestrian.velocity == 0 and sim.time == 0
+
         # test sidewalk crossing
-        sim = simulation()
+        sim = simulation.blank()
         sim.pedestrian.velocity = 2
-        sim.city_map.length['x'] = 3
-        sim.city_map.length['y'] = 5
+        sim.city_map.length[X] = 3
+        sim.city_map.length[Y] = 5
         sim.city_map.sidewalk_segment.x_length = 7
         sim.city_map.sidewalk_segment.y_length = 13
 
-        assert sim.city_map.sidewalk_position == 'upper_left'
+        assert sim.city_map.sidewalk_position == UL
         assert sim.time == 0
 
-        sim.cross_sidewalk('x', 'upper_right')
-        assert sim.city_map.sidewalk_position == 'upper_right'
+        sim.cross_sidewalk(X, UR)
+        assert sim.city_map.sidewalk_position == UR
         assert sim.time == 3.5
 
-        sim.cross_sidewalk('y', 'lower_right')
-        assert sim.city_map.sidewalk_position == 'lower_right'
+        sim.cross_sidewalk(Y, LR)
+        assert sim.city_map.sidewalk_position == LR
         assert sim.time == 10
 
         # test traffic_light crossing
-        sim = simulation()
+        sim = simulation.blank()
         sim.pedestrian.velocity = 2
-        sim.city_map.length['x'] = 3
-        sim.city_map.length['y'] = 5
+        sim.city_map.length[X] = 3
+        sim.city_map.length[Y] = 5
 
-        sim.city_map.sidewalk_position = 'upper_right'
+        sim.city_map.sidewalk_position = UR
         light = sim.city_map.get_current_traffic_light()
         light.x_length = 7
         light.y_length = 13
         sb = sim.city_map.sidewalk_segment
-        sim.cross_traffic_light('x')
+        sim.cross_traffic_light(X, light)
         assert sim.time == 3.5
-        assert sim.city_map.sidewalk_position == 'upper_left'
+        assert sim.city_map.sidewalk_position == UL
         assert sb != sim.city_map.sidewalk_segment
 
-        sim.city_map.sidewalk_position = 'lower_right'
+        sim.city_map.sidewalk_position = LR
         light = sim.city_map.get_current_traffic_light()
         light.x_length = 17
         light.y_length = 19
         sb = sim.city_map.sidewalk_segment
-        sim.cross_traffic_light('y')
+        sim.cross_traffic_light(Y, light)
         assert sim.time == 13
-        assert sim.city_map.sidewalk_position == 'upper_right'
+        assert sim.city_map.sidewalk_position == UR
         assert sb != sim.city_map.sidewalk_segment
 
         # test simulation_step - upper_left
-        sim = simulation()
+        sim = simulation.blank()
         sim.pedestrian.velocity = 2
-        sim.city_map.length['x'] = 3
-        sim.city_map.length['y'] = 5
+        sim.city_map.length[X] = 3
+        sim.city_map.length[Y] = 5
         sim.city_map.sidewalk_segment.x_length = 7
         sim.city_map.sidewalk_segment.y_length = 13
         sb = sim.city_map.sidewalk_segment
 
-        sim.city_map.end_reached = 'y'
+        sim.city_map.end_reached = END_Y
         sim.simulation_step()
-        assert sim.city_map.sidewalk_position == 'upper_right'
+        assert sim.city_map.sidewalk_position == UR
         assert sim.time == 3.5
         assert sim.cumulative_time_waiting_at_lights == 0
         assert sim.cumulative_proportion_light_half_cycles_waited_at == 0
         assert sim.cumulative_lights_waited_at == 0
         assert sb == sim.city_map.sidewalk_segment
 
-        sim.city_map.sidewalk_position = 'upper_left'
-        sim.city_map.end_reached = 'x'
+        sim.city_map.sidewalk_position = UL
+        sim.city_map.end_reached = END_X
         sim.simulation_step()
-        assert sim.city_map.sidewalk_position == 'lower_left'
+        assert sim.city_map.sidewalk_position == LL
         assert sim.time == 10
         assert sim.cumulative_time_waiting_at_lights == 0
         assert sim.cumulative_proportion_light_half_cycles_waited_at == 0
@@ -685,24 +1204,24 @@ class Tests:
         assert sb == sim.city_map.sidewalk_segment
 
         sim = simulation()
-        sim.city_map.length['x'] = 3
-        sim.city_map.length['y'] = 5
+        sim.city_map.length[X] = 3
+        sim.city_map.length[Y] = 5
         sb = sim.city_map.sidewalk_segment
         sim.simulation_step()
-        assert sim.city_map.sidewalk_position in ['lower_left', 'upper_right']
+        assert sim.city_map.sidewalk_position in [LL, UR]
         assert sb == sim.city_map.sidewalk_segment
 
         # test simulation_step - lower_left
-        sim = simulation()
+        sim = simulation.blank()
         sim.time = 28
         sim.pedestrian.velocity = 2
         sim.pedestrian.choice_wait_time = 99
-        sim.city_map.length['x'] = 3
-        sim.city_map.length['y'] = 5
+        sim.city_map.length[X] = 3
+        sim.city_map.length[Y] = 5
         sim.city_map.sidewalk_segment.x_length = 7
         sim.city_map.sidewalk_segment.y_length = 13
-        sim.city_map.sidewalk_position = 'lower_left'
-        sim.city_map.end_reached = 'y'
+        sim.city_map.sidewalk_position = LL
+        sim.city_map.end_reached = END_Y
         sb = sim.city_map.sidewalk_segment
         light = sim.city_map.get_current_traffic_light()
         light.x_signal_duration = 11
@@ -712,22 +1231,22 @@ class Tests:
         light.set_initial_time_offset(initial_state = 1)
         sim.simulation_step()
         assert sb == sim.city_map.sidewalk_segment
-        assert sim.city_map.sidewalk_position == 'lower_right'
+        assert sim.city_map.sidewalk_position == LR
         assert sim.time == 31.5
         assert sim.cumulative_time_waiting_at_lights == 0
         assert sim.cumulative_proportion_light_half_cycles_waited_at == 0
         assert sim.cumulative_lights_waited_at == 0
 
-        sim = simulation()
+        sim = simulation.blank()
         sim.time = 28
         sim.pedestrian.velocity = 2
         sim.pedestrian.choice_wait_time = 0
-        sim.city_map.length['x'] = 3
-        sim.city_map.length['y'] = 5
+        sim.city_map.length[X] = 3
+        sim.city_map.length[Y] = 5
         sim.city_map.sidewalk_segment.x_length = 7
         sim.city_map.sidewalk_segment.y_length = 13
-        sim.city_map.sidewalk_position = 'lower_left'
-        sim.city_map.end_reached = False
+        sim.city_map.sidewalk_position = LL
+        sim.city_map.end_reached = 0
         sb = sim.city_map.sidewalk_segment
         light = sim.city_map.get_current_traffic_light()
         light.x_signal_duration = 11
@@ -737,22 +1256,22 @@ class Tests:
         light.set_initial_time_offset(initial_state = 0)
         sim.simulation_step()
         assert sb == sim.city_map.sidewalk_segment
-        assert sim.city_map.sidewalk_position == 'lower_right'
+        assert sim.city_map.sidewalk_position == LR
         assert sim.time == 31.5
         assert sim.cumulative_time_waiting_at_lights == 0
         assert sim.cumulative_proportion_light_half_cycles_waited_at == 0
         assert sim.cumulative_lights_waited_at == 0
 
-        sim = simulation()
+        sim = simulation.blank()
         sim.time = 28
         sim.pedestrian.velocity = 2
         sim.pedestrian.choice_wait_time = 99
-        sim.city_map.length['x'] = 3
-        sim.city_map.length['y'] = 5
+        sim.city_map.length[X] = 3
+        sim.city_map.length[Y] = 5
         sim.city_map.sidewalk_segment.x_length = 7
         sim.city_map.sidewalk_segment.y_length = 13
-        sim.city_map.sidewalk_position = 'lower_left'
-        sim.city_map.end_reached = False
+        sim.city_map.sidewalk_position = LL
+        sim.city_map.end_reached = 0
         sb = sim.city_map.sidewalk_segment
         light = sim.city_map.get_current_traffic_light()
         light.x_signal_duration = 11
@@ -762,23 +1281,23 @@ class Tests:
         light.set_initial_time_offset(initial_state = 0)
         sim.simulation_step()
         assert sb != sim.city_map.sidewalk_segment
-        assert sim.city_map.sidewalk_position == 'upper_left'
+        assert sim.city_map.sidewalk_position == UL
         assert sim.time == 50.5
         assert sim.cumulative_time_waiting_at_lights == 11
         assert sim.cumulative_proportion_light_half_cycles_waited_at == 1
         assert sim.cumulative_lights_waited_at == 1
 
         # test simulation_step - upper_right
-        sim = simulation()
+        sim = simulation.blank()
         sim.time = 28
         sim.pedestrian.velocity = 2
         sim.pedestrian.choice_wait_time = 99
-        sim.city_map.length['x'] = 3
-        sim.city_map.length['y'] = 5
+        sim.city_map.length[X] = 3
+        sim.city_map.length[Y] = 5
         sim.city_map.sidewalk_segment.x_length = 7
         sim.city_map.sidewalk_segment.y_length = 13
-        sim.city_map.sidewalk_position = 'upper_right'
-        sim.city_map.end_reached = 'x'
+        sim.city_map.sidewalk_position = UR
+        sim.city_map.end_reached = END_X
         sb = sim.city_map.sidewalk_segment
         light = sim.city_map.get_current_traffic_light()
         light.x_signal_duration = 11
@@ -788,22 +1307,22 @@ class Tests:
         light.set_initial_time_offset(initial_state = 0)
         sim.simulation_step()
         assert sb == sim.city_map.sidewalk_segment
-        assert sim.city_map.sidewalk_position == 'lower_right'
+        assert sim.city_map.sidewalk_position == LR
         assert sim.time == 34.5
         assert sim.cumulative_time_waiting_at_lights == 0
         assert sim.cumulative_proportion_light_half_cycles_waited_at == 0
         assert sim.cumulative_lights_waited_at == 0
 
-        sim = simulation()
+        sim = simulation.blank()
         sim.time = 28
         sim.pedestrian.velocity = 2
         sim.pedestrian.choice_wait_time = 0
-        sim.city_map.length['x'] = 3
-        sim.city_map.length['y'] = 5
+        sim.city_map.length[X] = 3
+        sim.city_map.length[Y] = 5
         sim.city_map.sidewalk_segment.x_length = 7
         sim.city_map.sidewalk_segment.y_length = 13
-        sim.city_map.sidewalk_position = 'upper_right'
-        sim.city_map.end_reached = False
+        sim.city_map.sidewalk_position = UR
+        sim.city_map.end_reached = 0
         sb = sim.city_map.sidewalk_segment
         light = sim.city_map.get_current_traffic_light()
         light.x_signal_duration = 11
@@ -813,22 +1332,22 @@ class Tests:
         light.set_initial_time_offset(initial_state = 1)
         sim.simulation_step()
         assert sb == sim.city_map.sidewalk_segment
-        assert sim.city_map.sidewalk_position == 'lower_right'
+        assert sim.city_map.sidewalk_position == LR
         assert sim.time == 34.5
         assert sim.cumulative_time_waiting_at_lights == 0
         assert sim.cumulative_proportion_light_half_cycles_waited_at == 0
         assert sim.cumulative_lights_waited_at == 0
 
-        sim = simulation()
+        sim = simulation.blank()
         sim.time = 28
         sim.pedestrian.velocity = 2
         sim.pedestrian.choice_wait_time = 99
-        sim.city_map.length['x'] = 3
-        sim.city_map.length['y'] = 5
+        sim.city_map.length[X] = 3
+        sim.city_map.length[Y] = 5
         sim.city_map.sidewalk_segment.x_length = 7
         sim.city_map.sidewalk_segment.y_length = 13
-        sim.city_map.sidewalk_position = 'upper_right'
-        sim.city_map.end_reached = False
+        sim.city_map.sidewalk_position = UR
+        sim.city_map.end_reached = 0
         sb = sim.city_map.sidewalk_segment
         light = sim.city_map.get_current_traffic_light()
         light.x_signal_duration = 11
@@ -838,23 +1357,23 @@ class Tests:
         light.set_initial_time_offset(initial_state = 1)
         sim.simulation_step()
         assert sb != sim.city_map.sidewalk_segment
-        assert sim.city_map.sidewalk_position == 'upper_left'
+        assert sim.city_map.sidewalk_position == UL
         assert sim.time == 54.5
         assert sim.cumulative_time_waiting_at_lights == 17
         assert sim.cumulative_proportion_light_half_cycles_waited_at == 1
         assert sim.cumulative_lights_waited_at == 1
 
         # test simulation_step - lower_right
-        sim = simulation()
+        sim = simulation.blank()
         sim.time = 28
         sim.pedestrian.velocity = 2
         sim.pedestrian.choice_wait_time = 99
-        sim.city_map.length['x'] = 3
-        sim.city_map.length['y'] = 5
+        sim.city_map.length[X] = 3
+        sim.city_map.length[Y] = 5
         sim.city_map.sidewalk_segment.x_length = 7
         sim.city_map.sidewalk_segment.y_length = 13
-        sim.city_map.sidewalk_position = 'lower_right'
-        sim.city_map.end_reached = 'x'
+        sim.city_map.sidewalk_position = LR
+        sim.city_map.end_reached = END_X
         sb = sim.city_map.sidewalk_segment
         light = sim.city_map.get_current_traffic_light()
         light.x_signal_duration = 11
@@ -864,22 +1383,22 @@ class Tests:
         light.set_initial_time_offset(initial_state = 0)
         sim.simulation_step()
         assert sb != sim.city_map.sidewalk_segment
-        assert sim.city_map.sidewalk_position == 'upper_right'
+        assert sim.city_map.sidewalk_position == UR
         assert sim.time == 50.5
         assert sim.cumulative_time_waiting_at_lights == 11
         assert sim.cumulative_proportion_light_half_cycles_waited_at == 1
         assert sim.cumulative_lights_waited_at == 1
 
-        sim = simulation()
+        sim = simulation.blank()
         sim.time = 28
         sim.pedestrian.velocity = 2
         sim.pedestrian.choice_wait_time = 99
-        sim.city_map.length['x'] = 3
-        sim.city_map.length['y'] = 5
+        sim.city_map.length[X] = 3
+        sim.city_map.length[Y] = 5
         sim.city_map.sidewalk_segment.x_length = 7
         sim.city_map.sidewalk_segment.y_length = 13
-        sim.city_map.sidewalk_position = 'lower_right'
-        sim.city_map.end_reached = 'y'
+        sim.city_map.sidewalk_position = LR
+        sim.city_map.end_reached = END_Y
         sb = sim.city_map.sidewalk_segment
         light = sim.city_map.get_current_traffic_light()
         light.x_signal_duration = 11
@@ -889,22 +1408,22 @@ class Tests:
         light.set_initial_time_offset(initial_state = 1)
         sim.simulation_step()
         assert sb != sim.city_map.sidewalk_segment
-        assert sim.city_map.sidewalk_position == 'lower_left'
+        assert sim.city_map.sidewalk_position == LL
         assert sim.time == 54.5
         assert sim.cumulative_time_waiting_at_lights == 17
         assert sim.cumulative_proportion_light_half_cycles_waited_at == 1
         assert sim.cumulative_lights_waited_at == 1
 
-        sim = simulation()
+        sim = simulation.blank()
         sim.time = 28
         sim.pedestrian.velocity = 2
         sim.pedestrian.choice_wait_time = 0
-        sim.city_map.length['x'] = 3
-        sim.city_map.length['y'] = 5
+        sim.city_map.length[X] = 3
+        sim.city_map.length[Y] = 5
         sim.city_map.sidewalk_segment.x_length = 7
         sim.city_map.sidewalk_segment.y_length = 13
-        sim.city_map.sidewalk_position = 'lower_right'
-        sim.city_map.end_reached = False
+        sim.city_map.sidewalk_position = LR
+        sim.city_map.end_reached = 0
         sb = sim.city_map.sidewalk_segment
         light = sim.city_map.get_current_traffic_light()
         light.x_signal_duration = 11
@@ -914,22 +1433,22 @@ class Tests:
         light.set_initial_time_offset(initial_state = 0)
         sim.simulation_step()
         assert sb != sim.city_map.sidewalk_segment
-        assert sim.city_map.sidewalk_position == 'lower_left'
+        assert sim.city_map.sidewalk_position == LL
         assert sim.time == 37.5
         assert sim.cumulative_time_waiting_at_lights == 0
         assert sim.cumulative_proportion_light_half_cycles_waited_at == 0
         assert sim.cumulative_lights_waited_at == 1
 
-        sim = simulation()
+        sim = simulation.blank()
         sim.time = 28
         sim.pedestrian.velocity = 2
         sim.pedestrian.choice_wait_time = 0
-        sim.city_map.length['x'] = 3
-        sim.city_map.length['y'] = 5
+        sim.city_map.length[X] = 3
+        sim.city_map.length[Y] = 5
         sim.city_map.sidewalk_segment.x_length = 7
         sim.city_map.sidewalk_segment.y_length = 13
-        sim.city_map.sidewalk_position = 'lower_right'
-        sim.city_map.end_reached = False
+        sim.city_map.sidewalk_position = LR
+        sim.city_map.end_reached = 0
         sb = sim.city_map.sidewalk_segment
         light = sim.city_map.get_current_traffic_light()
         light.x_signal_duration = 11
@@ -939,22 +1458,22 @@ class Tests:
         light.set_initial_time_offset(initial_state = 1)
         sim.simulation_step()
         assert sb != sim.city_map.sidewalk_segment
-        assert sim.city_map.sidewalk_position == 'upper_right'
+        assert sim.city_map.sidewalk_position == UR
         assert sim.time == 39.5
         assert sim.cumulative_time_waiting_at_lights == 0
         assert sim.cumulative_proportion_light_half_cycles_waited_at == 0
         assert sim.cumulative_lights_waited_at == 1
 
-        sim = simulation()
+        sim = simulation.blank()
         sim.time = 28
         sim.pedestrian.velocity = 2
         sim.pedestrian.choice_wait_time = 0
-        sim.city_map.length['x'] = 3
-        sim.city_map.length['y'] = 5
+        sim.city_map.length[X] = 3
+        sim.city_map.length[Y] = 5
         sim.city_map.sidewalk_segment.x_length = 7
         sim.city_map.sidewalk_segment.y_length = 13
-        sim.city_map.sidewalk_position = 'lower_right'
-        sim.city_map.end_reached = False
+        sim.city_map.sidewalk_position = LR
+        sim.city_map.end_reached = 0
         sb = sim.city_map.sidewalk_segment
         light = sim.city_map.get_current_traffic_light()
         light.x_signal_duration = 11
@@ -964,22 +1483,22 @@ class Tests:
         light.set_initial_time_offset(initial_state = 1.9)
         sim.simulation_step()
         assert sb != sim.city_map.sidewalk_segment
-        assert sim.city_map.sidewalk_position == 'lower_left'
+        assert sim.city_map.sidewalk_position == LL
         assert abs(sim.cumulative_time_waiting_at_lights - 1.7) < 0.00001
         assert abs(sim.cumulative_proportion_light_half_cycles_waited_at - 0.1) < 0.00001
         assert sim.time == 39.2
         assert sim.cumulative_lights_waited_at == 1
 
-        sim = simulation()
+        sim = simulation.blank()
         sim.time = 28
         sim.pedestrian.velocity = 2
         sim.pedestrian.choice_wait_time = 0
-        sim.city_map.length['x'] = 3
-        sim.city_map.length['y'] = 5
+        sim.city_map.length[X] = 3
+        sim.city_map.length[Y] = 5
         sim.city_map.sidewalk_segment.x_length = 7
         sim.city_map.sidewalk_segment.y_length = 13
-        sim.city_map.sidewalk_position = 'lower_right'
-        sim.city_map.end_reached = False
+        sim.city_map.sidewalk_position = LR
+        sim.city_map.end_reached = 0
         sb = sim.city_map.sidewalk_segment
         light = sim.city_map.get_current_traffic_light()
         light.x_signal_duration = 11
@@ -989,7 +1508,7 @@ class Tests:
         light.set_initial_time_offset(initial_state = 0.9)
         sim.simulation_step()
         assert sb != sim.city_map.sidewalk_segment
-        assert sim.city_map.sidewalk_position == 'upper_right'
+        assert sim.city_map.sidewalk_position == UR
         assert sim.time == 40.6
         assert abs(sim.cumulative_time_waiting_at_lights- 1.1) < 0.00001
         assert abs(sim.cumulative_proportion_light_half_cycles_waited_at - 0.1) < 0.00001
@@ -997,20 +1516,58 @@ class Tests:
 
         # test simulation
         sim = simulation()
-        sim.city_map.length['x'] = 3
-        sim.city_map.length['y'] = 5
+        sim.city_map.length[X] = 3
+        sim.city_map.length[Y] = 5
         sb = sim.city_map.sidewalk_segment
         sim.simulate()
         assert sb != sim.city_map.sidewalk_segment
-        assert sim.city_map.end_reached == True
-        assert sim.city_map.grid_position['x'] == 3
-        assert sim.city_map.grid_position['y'] == 5
+        assert sim.city_map.end_reached == END_XY
+        assert sim.city_map.grid_position[X] == 3
+        assert sim.city_map.grid_position[Y] == 5
+
+        # test a walk which stops making progress is cut off
+        sim = simulation()
+        sim._steps = (lambda: None,) * 4
+        try:
+            sim.simulate()
+            assert False
+        except RuntimeError:
+            pass
+        sim = simulation()
+        sim.city_map.end_reached = END_X
+        sim._steps = (lambda: None,) * 4
+        try:
+            sim.simulate()
+            assert False
+        except RuntimeError:
+            pass
+
+        # test lengths below 1 still finish, each direction crossing one light as in simulation_step
+        for lengths, grid_position in [((0.5, 0.5), [2, 2]), ((0.9, 3), [2, 3]), ((0, 0), [2, 2])]:
+            for seed in range(20):
+                sim = simulation(rng=random.Random(seed))
+                sim.city_map.length = list(lengths)
+                sim.simulate()
+                assert sim.city_map.end_reached == END_XY
+                assert sim.city_map.grid_position == grid_position
+
+        # test _finish_straight_line walks the same path as stepping until the end
+        for seed in range(20):
+            stepped, finished = simulation(rng=random.Random(seed)), simulation(rng=random.Random(seed))
+            while stepped.city_map.end_reached != END_XY:
+                stepped.simulation_step()
+            finished.simulate()
+            assert finished.city_map.grid_position == stepped.city_map.grid_position
+            assert finished.time == stepped.time
+            assert finished.cumulative_time_waiting_at_lights == stepped.cumulative_time_waiting_at_lights
+            assert finished.cumulative_proportion_light_half_cycles_waited_at == stepped.cumulative_proportion_light_half_cycles_waited_at
+            assert finished.cumulative_lights_waited_at == stepped.cumulative_lights_waited_at
 
     def test_monte_carlo(self):
         # check for correct number of outputs, and sanity check bounds
-        for n in [1, 7, 101]:
+        for n, method in [(n, method) for method in ['jit', 'vectorized', 'python'] for n in [1, 7, 101]]:
             mc = monte_carlo()
-            mc.run_simulations(n=n)
+            mc.run_simulations(n=n, method=method)
             assert len(mc.log['choice_wait_time']) == n
             assert len(mc.log['average_time_waiting_per_light']) == n
             assert len(mc.log['average_proportion_light_half_cycles_waited_at']) == n
@@ -1021,12 +1578,116 @@ class Tests:
             for x in mc.log['average_proportion_light_half_cycles_waited_at']:
                 assert 0 <= x <= CROSSWALK_DURATION[1] * 2 / CROSSWALK_DURATION[0]
 
+        # check repeated runs accumulate
+        mc = monte_carlo()
+        mc.run_simulations(n=3)
+        mc.run_simulations(n=4, method='vectorized')
+        for name in monte_carlo.log_names:
+            assert mc.log[name].shape == (7,)
+
+        # check seeded reference simulations log identically, in seed order, regardless of worker count
+        assert _run_one(7) == _run_one(7)
+        logs = []
+        for processes in [1, 3, 4]:
+            random.seed(11)
+            mc = monte_carlo()
+            mc.run_simulations(n=13, method='python', processes=processes)
+            logs.append(mc.log['choice_wait_time'].tolist())
+        assert logs[0] == logs[1] == logs[2]
+
+        # check misspelled methods are rejected rather than run as another method
+        try:
+            monte_carlo().run_simulations(n=1, method='pyhton')
+            assert False
+        except ValueError:
+            pass
+
+        # check every method is reproducible both under random.seed and from its seed argument
+        for method in ['jit', 'vectorized', 'python']:
+            logs = []
+            for seed in [None, None, 5, 5]:
+                random.seed(11)
+                mc = monte_carlo()
+                mc.run_simulations(n=9, method=method, processes=2, seed=seed)
+                logs.append(mc.log['average_time_waiting_per_light'].tolist())
+            assert logs[0] == logs[1]
+            assert logs[2] == logs[3]
+            assert logs[0] != logs[2]
+
+    def test_jit(self):
+        # compare compiled light arithmetic against the reference traffic_light
+        light = traffic_light(x_length=3, y_length=5, x_signal_duration=7, y_signal_duration=11, initial_state=0.5)
+        light_row = np.array([3, 5, 7, 11, light.initial_cycle_time], dtype=np.float64)
+
+        for time in [0, 2.5, 4.5, 16, 21.5, 4.5 + 19*3]:
+            light.set_state(time)
+            for direction in [X, Y]:
+                for velocity in [0.1, 1, 2]:
+                    expected = light.time_until_can_cross(direction, velocity)
+                    assert abs(_jit_time_until_can_cross(light_row, time, direction, velocity) - expected) < 0.00001
+
+        # test light creation matches sizes to grid-aligned neighbours, and reuses existing lights
+        segments = np.full((4, 5), np.nan)
+        light_ur = _jit_get_current_traffic_light(segments, UR).copy()
+        assert np.isnan(segments[UL]).all() and np.isnan(segments[LL]).all() and np.isnan(segments[LR]).all()
+        assert (_jit_get_current_traffic_light(segments, UR) == light_ur).all()
+        light_lr = _jit_get_current_traffic_light(segments, LR)
+        light_ul = _jit_get_current_traffic_light(segments, UL)
+        light_ll = _jit_get_current_traffic_light(segments, LL)
+        assert light_ul[LIGHT_Y_LENGTH] == light_ur[LIGHT_Y_LENGTH]
+        assert light_ur[LIGHT_X_LENGTH] == light_lr[LIGHT_X_LENGTH]
+        assert light_lr[LIGHT_Y_LENGTH] == light_ll[LIGHT_Y_LENGTH]
+        assert light_ll[LIGHT_X_LENGTH] == light_ul[LIGHT_X_LENGTH]
+
+        # check seeded simulations are reproducible, regardless of thread scheduling
+        seeds = np.arange(3, dtype=np.uint32)
+        n = 2 * _JIT_SEED_BLOCK + 5
+        assert (_jit_run_simulations(n, seeds) == _jit_run_simulations(n, seeds)).all()
+        assert (_jit_run_simulations(_JIT_SEED_BLOCK, seeds) == _jit_run_simulations(n, seeds)[:_JIT_SEED_BLOCK]).all()
+
+        # test full simulations produce sane logged data
+        for _ in range(20):
+            choice_wait_time, time_waiting, proportion_waited, lights_waited_at = _jit_simulate()
+            assert WAIT_TIME[0] <= choice_wait_time <= WAIT_TIME[1]
+            assert time_waiting >= 0
+            assert proportion_waited >= 0
+            assert lights_waited_at >= (GRID_LENGTH[0] - 1) * 2
+
+    def test_vectorized(self):
+        # compare lanewise light arithmetic against the compiled kernel
+        segments = np.full((4, 5), np.nan)
+        lights = np.array([_jit_get_current_traffic_light(segments, position) for position in [UL, UR, LL, LR]] * 25)
+        time = np.linspace(0, 1000, len(lights))
+        velocity = np.linspace(0.5, 5, len(lights))
+        direction = np.arange(len(lights)) % 2
+
+        cross_wait_time = _vec_time_until_can_cross(lights, time, direction, velocity)
+        for i in range(len(lights)):
+            assert abs(cross_wait_time[i] - _jit_time_until_can_cross(lights[i], time[i], direction[i], velocity[i])) < 0.00001
+
+        # test light creation matches sizes to grid-aligned neighbours, and reuses existing lights
+        segments = np.full((2, 4, 5), np.nan)
+        lanes = np.array([0, 1])
+        light_ur = _vec_get_current_traffic_lights(segments, lanes, np.array([UR, UR]))
+        assert (_vec_get_current_traffic_lights(segments, lanes, np.array([UR, UR])) == light_ur).all()
+        light_lr = _vec_get_current_traffic_lights(segments, lanes, np.array([LR, LR]))
+        light_ul = _vec_get_current_traffic_lights(segments, lanes, np.array([UL, UL]))
+        light_ll = _vec_get_current_traffic_lights(segments, lanes, np.array([LL, LL]))
+        assert (light_ul[:, LIGHT_Y_LENGTH] == light_ur[:, LIGHT_Y_LENGTH]).all()
+        assert (light_ur[:, LIGHT_X_LENGTH] == light_lr[:, LIGHT_X_LENGTH]).all()
+        assert (light_lr[:, LIGHT_Y_LENGTH] == light_ll[:, LIGHT_Y_LENGTH]).all()
+        assert (light_ll[:, LIGHT_X_LENGTH] == light_ul[:, LIGHT_X_LENGTH]).all()
+        assert (light_ul[0] != light_ul[1]).all()
+
+        # check seeded generators are reproducible
+        assert (_vec_run_simulations(11, np.random.default_rng(3)) == _vec_run_simulations(11, np.random.default_rng(3))).all()
+
     def test_initialization_randoms(self):
         # TODO execute random init functions, but don't test output
-        # traffic_light()
-        # sidewalk_block()
-        # pedestrian()
-        # city_map()
+        # traffic_light.random()
+        # sidewalk_block.random()
+        # pedestrian.random()
+        # city_map.random()
         # simulation()
 
         # TODO